@@ -1,11 +1,9 @@
+import hashlib
+
 import streamlit as st
 
 from nlp_utils import preprocess_text
-from cognitive_load import cognitive_load
-from manipulation_analysis import manipulation_score
-from emotion_analysis import emotion_analysis
-from decision_risk import decision_risk
-from info_quality import information_quality
+from pipeline import ANALYZERS
 from pdf_report import generate_pdf_report
 
 import nltk
@@ -39,25 +37,85 @@ if not text_input.strip():
     st.stop()
 
 clean_text = preprocess_text(text_input)
-
-# ---------------- Analysis ----------------
-cog = cognitive_load(clean_text)
-manip = manipulation_score(clean_text)
-emo = emotion_analysis(clean_text)
-dec = decision_risk(clean_text)
-qual = information_quality(clean_text)
-
-# ---------------- Tabs ----------------
-tabs = st.tabs([
+text_hash = hashlib.sha256(clean_text.encode("utf-8")).hexdigest()
+
+# ---------------- Analysis (lazy, cached per session & text) ----------------
+# Display labels for the analyzers in pipeline.ANALYZERS
+LABELS = {
+    "cog": "Cognitive Load",
+    "manip": "Manipulation",
+    "emo": "Emotion",
+    "dec": "Decision Risk",
+    "qual": "Information Quality",
+}
+
+# Inputs above this many characters get a progress bar while analyzing
+LARGE_INPUT_CHARS = 20000
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def cached_analysis(key: str, text_hash: str, _text: str) -> dict:
+    """
+    Shared across sessions: concurrent users pasting the same text reuse
+    one result. Keyed by text_hash; the text itself is not hashed again.
+    """
+    return ANALYZERS[key](_text)
+
+
+# Only results for the current text are kept, so memory per session stays
+# bounded no matter how many different texts are pasted.
+if st.session_state.get("hciis_text_hash") != text_hash:
+    st.session_state["hciis_text_hash"] = text_hash
+    st.session_state["hciis_results"] = {}
+
+
+def get_result(key: str) -> dict:
+    """Run an analyzer on first use and reuse its result on later reruns."""
+    results = st.session_state["hciis_results"]
+    if key not in results:
+        with st.spinner(f"Analyzing {LABELS[key]}..."):
+            results[key] = cached_analysis(key, text_hash, clean_text)
+    return results[key]
+
+
+def get_all_results() -> dict:
+    """Run every pending analyzer, showing progress for large inputs."""
+    results = st.session_state["hciis_results"]
+    pending = [k for k in ANALYZERS if k not in results]
+
+    if pending and len(clean_text) > LARGE_INPUT_CHARS:
+        progress = st.progress(0.0, text="Starting analysis...")
+        for i, key in enumerate(pending):
+            progress.progress(i / len(pending), text=f"Analyzing {LABELS[key]}...")
+            results[key] = cached_analysis(key, text_hash, clean_text)
+        progress.progress(1.0, text="Analysis complete.")
+        progress.empty()
+
+    return {key: get_result(key) for key in ANALYZERS}
+
+
+# ---------------- Sections ----------------
+# st.tabs renders every tab body on each run, which would force all five
+# analyzers to execute. A horizontal radio renders only the selected
+# section, so each analyzer runs when its section (or the report) needs it.
+SECTIONS = [
     "🧠 Cognitive Load",
     "🎯 Manipulation",
     "😊 Emotion",
     "⚖️ Decision Risk",
     "📊 Information Quality",
     "📄 Download Report"
-])
+]
 
-with tabs[0]:
+section = st.radio(
+    "Section",
+    SECTIONS,
+    horizontal=True,
+    label_visibility="collapsed"
+)
+
+if section == SECTIONS[0]:
+    cog = get_result("cog")
     st.subheader("Cognitive Load & Attention Risk")
     st.metric("Cognitive Load Score", cog["load"])
     st.metric("Attention Drop Risk", cog["attention_drop"])
@@ -73,7 +131,8 @@ with tabs[0]:
         Higher scores indicate greater attention fatigue and higher risk of reader disengagement.
         """)
 
-with tabs[1]:
+if section == SECTIONS[1]:
+    manip = get_result("manip")
     st.subheader("Manipulation & Persuasion")
     st.metric("Manipulation Score", manip["score"])
     st.write(manip["details"])
@@ -92,7 +151,8 @@ with tabs[1]:
         Scores are normalized by text length to avoid overestimation in short content.
         """)
 
-with tabs[2]:
+if section == SECTIONS[2]:
+    emo = get_result("emo")
     st.subheader("Emotion & Tone Analysis")
     st.metric("Dominant Emotion", emo["dominant"])
     st.metric("Emotional Volatility", emo["volatility"])
@@ -111,7 +171,8 @@ with tabs[2]:
         This provides insight into emotional stability and hidden affect.
         """)
 
-with tabs[3]:
+if section == SECTIONS[3]:
+    dec = get_result("dec")
     st.subheader("Decision Risk & Ambiguity")
     st.metric("Decision Density", dec["density"])
     st.metric("Ambiguity Score", dec["ambiguity"])
@@ -130,7 +191,8 @@ with tabs[3]:
         High ambiguity scores indicate unclear commitments and potential decision traps.
         """)
 
-with tabs[4]:
+if section == SECTIONS[4]:
+    qual = get_result("qual")
     st.subheader("Information Quality Index")
     st.metric("Quality Score", qual["quality"])
     st.write(qual["analysis"])
@@ -149,12 +211,18 @@ with tabs[4]:
         Higher scores indicate high signal-to-noise ratio and substantive content.
         """)
 
-with tabs[5]:
+@st.fragment
+def report_section():
+    """
+    Report generation runs as a fragment, so clicking "Generate PDF"
+    reruns only this block instead of the whole script.
+    """
     st.subheader("Generate Academic PDF Report")
 
     if st.button("Generate PDF"):
+        r = get_all_results()
         pdf_file = generate_pdf_report(
-            text_input, cog, manip, emo, dec, qual
+            text_input, r["cog"], r["manip"], r["emo"], r["dec"], r["qual"]
         )
 
         with open(pdf_file, "rb") as f:
@@ -164,3 +232,7 @@ with tabs[5]:
                 file_name="HCIIS_Report.pdf",
                 mime="application/pdf"
             )
+
+
+if section == SECTIONS[5]:
+    report_section()
@@ -0,0 +1,310 @@
+import heapq
+import random
+import time
+
+from nlp_utils import get_sentences, get_words, preprocess_text, STOP_WORDS
+from pipeline import ANALYZERS
+from sentence_cache import SENTENCE_CACHE
+import decision_risk
+import emotion_analysis
+from manipulation_analysis import (
+    FEAR_WORDS,
+    AUTHORITY_PHRASES,
+    CERTAINTY_WORDS,
+    EMOTIONAL_WORDS
+)
+from info_quality import EVIDENCE_MARKERS, RHETORICAL_WORDS
+
+# Numeric outputs estimated for each analyzer
+METRICS = {
+    "cog": ["load"],
+    "manip": ["score"],
+    "emo": ["volatility"],
+    "dec": ["density", "ambiguity"],
+    "qual": ["quality"],
+}
+
+# Per-sentence feature columns, summed over the sample
+FIELDS = (
+    "length", "length_sq", "content", "words", "fear", "certainty",
+    "emotional", "evidence", "rhetoric", "mixed", "decision", "ambiguity"
+)
+
+
+def iter_sentences(text: str, chunk_chars: int = 65536):
+    """
+    Yield the sentences of text, splitting one chunk at a time so the
+    full sentence list is never built. The last sentence of each chunk
+    may be cut off, so it is carried over into the next chunk.
+    """
+    pos = 0
+    carry = ""
+    while pos < len(text):
+        buf = carry + text[pos:pos + chunk_chars]
+        pos += chunk_chars
+        sentences = get_sentences(buf)
+        carry = ""
+        if pos < len(text) and sentences:
+            last = sentences.pop()
+            carry = buf[buf.rindex(last):]
+        yield from sentences
+
+
+def _reservoir(sentences, size, rng):
+    """
+    Bottom-k reservoir: every sentence gets a random key and the `size`
+    smallest keys are kept. Returned in key order, so every prefix is a
+    uniform sample without replacement. Also returns the sentence count.
+    """
+    heap = []
+    total = 0
+    for s in sentences:
+        total += 1
+        key = rng.random()
+        if len(heap) < size:
+            heapq.heappush(heap, (-key, s))
+        elif key < -heap[0][0]:
+            heapq.heapreplace(heap, (-key, s))
+    return [s for _, s in sorted(heap, reverse=True)], total
+
+
+def _sentence_row(s: str):
+    """Feature row (in FIELDS order) and authority phrases found in s."""
+    tokens = get_words(s)
+    words = [w for w in tokens if w.isalpha()]
+    s_lower = s.lower()
+    dec = SENTENCE_CACHE.get("decision_risk", s, decision_risk.sentence_features)
+    emo = SENTENCE_CACHE.get("emotion_analysis", s, emotion_analysis.sentence_features)
+
+    row = (
+        len(tokens),
+        len(tokens) ** 2,
+        sum(1 for w in words if w not in STOP_WORDS),
+        len(words),
+        sum(1 for w in words if w in FEAR_WORDS),
+        sum(1 for w in words if w in CERTAINTY_WORDS),
+        sum(1 for w in words if w in EMOTIONAL_WORDS),
+        sum(1 for w in words if w in EVIDENCE_MARKERS),
+        sum(1 for w in words if w in RHETORICAL_WORDS),
+        int(emo["mixed"]),
+        int(dec["decision"]),
+        dec["ambiguity"] + dec["vague"],
+    )
+    authority = {p for p in AUTHORITY_PHRASES if p in s_lower}
+    return row, authority
+
+
+def _metrics(sums: dict, m: int, authority_rate: float) -> dict:
+    """
+    Plug sample sums into each analyzer's formula.
+    Word-level ratios use ratio estimators (sum / sum); sentence-level
+    rates and length moments use per-sentence means. authority_rate is
+    authority phrases per sentence.
+
+    information_quality depends on the whole-document unique/total word
+    ratio, which a sentence sample cannot estimate, so only its value
+    with that term at 0 is returned ("quality_floor").
+    """
+    mean_len = sums["length"] / m
+    var_len = max(sums["length_sq"] / m - mean_len ** 2, 0.0)
+    lex_density = round(sums["content"] / sums["length"], 3) if sums["length"] else 0
+    words = sums["words"]
+
+    load = round(
+        (min(mean_len / 25, 1) * 40) +
+        (min(var_len / 50, 1) * 30) +
+        (min(lex_density / 0.7, 1) * 30),
+        2
+    )
+
+    if words:
+        score = (
+            sums["fear"] / words * 30 +
+            sums["certainty"] / words * 25 +
+            sums["emotional"] / words * 25 +
+            authority_rate * 20
+        )
+        score = round(min(score * 100, 100), 2)
+        evidence_density = sums["evidence"] / words
+        rhetoric_density = sums["rhetoric"] / words
+    else:
+        score = 0
+        evidence_density = rhetoric_density = 0.0
+
+    quality_floor = (
+        (min(evidence_density / 0.05, 1) * 35) +
+        ((1 - min(rhetoric_density / 0.05, 1)) * 25) +
+        (min(var_len / 40, 1) * 15)
+    ) * 100
+
+    return {
+        "cog.load": load,
+        "manip.score": score,
+        "emo.volatility": round(sums["mixed"] / m, 3),
+        "dec.density": round(sums["decision"] / m, 3),
+        "dec.ambiguity": round(min(sums["ambiguity"] / m, 1.0), 3),
+        "qual.quality_floor": round(quality_floor, 2),
+    }
+
+
+def _sums(rows, idx=None):
+    if idx is None:
+        return {f: sum(r[i] for r in rows) for i, f in enumerate(FIELDS)}
+    return {f: sum(rows[j][i] for j in idx) for i, f in enumerate(FIELDS)}
+
+
+def _bootstrap(rows, authority_rate, rng, resamples, confidence):
+    """Percentile bootstrap interval for every metric."""
+    m = len(rows)
+    draws = {}
+    for _ in range(resamples):
+        idx = rng.choices(range(m), k=m)
+        for name, value in _metrics(_sums(rows, idx), m, authority_rate).items():
+            draws.setdefault(name, []).append(value)
+
+    alpha = (1 - confidence) / 2
+    intervals = {}
+    for name, values in draws.items():
+        values.sort()
+        lo = values[int(alpha * (len(values) - 1))]
+        hi = values[int(round((1 - alpha) * (len(values) - 1)))]
+        intervals[name] = (lo, hi)
+    return intervals
+
+
+def _exact_result(text, keys, total):
+    exact = {key: ANALYZERS[key](text) for key in keys}
+    return {
+        "exact": True,
+        "total_sentences": total,
+        "sample_size": total,
+        "estimates": {
+            key: {
+                field: {
+                    "estimate": exact[key].get(field, 0),
+                    "low": exact[key].get(field, 0),
+                    "high": exact[key].get(field, 0),
+                    "estimable": True,
+                }
+                for field in METRICS[key]
+            }
+            for key in keys
+        },
+    }
+
+
+def approximate_analysis(
+    text: str,
+    keys=None,
+    sample_size: int = 500,
+    max_sample: int = 5000,
+    confidence: float = 0.95,
+    resamples: int = 200,
+    time_budget: float = None,
+    target_width: float = None,
+    seed: int = 0,
+) -> dict:
+    """
+    Fast approximate scores based on sentence sampling.
+
+    Sentences are split one chunk at a time and a uniform reservoir of up
+    to `max_sample` sentences is kept. Only sampled sentences are
+    tokenized; the cost of the rest of the document is sentence splitting.
+    Scores are built from per-sentence features of the first
+    `sample_size` reservoir sentences, with percentile bootstrap
+    confidence intervals.
+
+    If `time_budget` (seconds) is given, the sample is doubled until the
+    reservoir is exhausted, every interval is narrower than `target_width`
+    (in each metric's own units), or the next round would not fit in the
+    budget. The budget is soft: the first round always runs, and later
+    rounds are skipped based on how long the previous one took, so it can
+    still be overshot somewhat.
+
+    Limits:
+    - manipulation's authority term counts distinct phrases found anywhere
+      in the document; a sample can only find some of them, so the
+      interval's upper end allows for all phrases being present.
+    - information_quality depends on the document-wide unique/total word
+      ratio and is not estimable from a sample. Its estimate is None and
+      low/high bound the score over every possible redundancy.
+    - Sentence lengths come from the lowercased tokens, which can differ
+      slightly from cognitive_load's tokenization.
+
+    The text is preprocessed as in pipeline.analyze_document, and
+    documents with at most `sample_size` sentences are scored exactly.
+    """
+    keys = list(keys or METRICS)
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    text = preprocess_text(text)
+
+    reservoir, total = _reservoir(iter_sentences(text), max(sample_size, max_sample), rng)
+    if total <= sample_size:
+        return _exact_result(text, keys, total)
+
+    rows = []
+    authority = set()
+    m = min(sample_size, len(reservoir))
+
+    while True:
+        round_start = time.perf_counter()
+        for s in reservoir[len(rows):m]:
+            row, found = _sentence_row(s)
+            rows.append(row)
+            authority |= found
+
+        authority_rate = len(authority) / total
+        point = _metrics(_sums(rows), m, authority_rate)
+        intervals = _bootstrap(rows, authority_rate, rng, resamples, confidence)
+
+        # Upper end allows for authority phrases the sample missed
+        upper_rate = len(AUTHORITY_PHRASES) / total
+        manip_high = _metrics(_sums(rows), m, upper_rate)["manip.score"]
+        lo, hi = intervals["manip.score"]
+        intervals["manip.score"] = (lo, max(hi, manip_high))
+
+        widest = max(hi - lo for name, (lo, hi) in intervals.items()
+                     if name != "qual.quality_floor")
+        if (
+            time_budget is None
+            or m >= len(reservoir)
+            or (target_width is not None and widest <= target_width)
+        ):
+            break
+
+        # Tokenizing and bootstrapping both grow with the sample, so the
+        # doubled round takes about twice as long as this one
+        now = time.perf_counter()
+        if now + 2 * (now - round_start) > start + time_budget:
+            break
+        m = min(m * 2, len(reservoir))
+
+    estimates = {}
+    for key in keys:
+        estimates[key] = {}
+        for field in METRICS[key]:
+            if (key, field) == ("qual", "quality"):
+                lo, hi = intervals["qual.quality_floor"]
+                estimates[key][field] = {
+                    "estimate": None,
+                    "low": lo,
+                    "high": round(hi + 25 * 100, 2),
+                    "estimable": False,
+                }
+                continue
+            name = f"{key}.{field}"
+            lo, hi = intervals[name]
+            estimates[key][field] = {
+                "estimate": point[name],
+                "low": lo,
+                "high": hi,
+                "estimable": True,
+            }
+
+    return {
+        "exact": False,
+        "total_sentences": total,
+        "sample_size": m,
+        "estimates": estimates,
+    }
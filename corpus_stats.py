@@ -0,0 +1,273 @@
+import heapq
+import itertools
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from pipeline import analyze_document
+from sentence_cache import SENTENCE_CACHE
+
+# decision_risk reports "High ambiguity" above this score
+HIGH_AMBIGUITY = 0.4
+
+
+class TopK:
+    """
+    Keeps the k documents with the highest score.
+    Backed by a min-heap of size k, so memory is O(k).
+    Items are ordered by (score, doc_id), so ties are broken by doc id and
+    the result doesn't depend on the order documents or merges arrive in.
+    """
+
+    def __init__(self, k: int = 100):
+        self.k = k
+        self._heap = []
+
+    def add(self, score, doc_id):
+        item = (score, doc_id)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, item)
+        elif item > self._heap[0]:
+            heapq.heapreplace(self._heap, item)
+
+    def merge(self, other: "TopK"):
+        for score, doc_id in other._heap:
+            self.add(score, doc_id)
+        return self
+
+    def items(self):
+        """Return (doc_id, score) pairs, highest score first."""
+        ranked = sorted(self._heap, reverse=True)
+        return [(doc_id, score) for score, doc_id in ranked]
+
+
+class QuantileSketch:
+    """
+    Fixed-range histogram for approximate quantiles.
+    Memory is O(bins); two sketches with the same range merge exactly.
+    Quantiles are accurate to (high - low) / bins.
+    """
+
+    def __init__(self, low: float = 0.0, high: float = 100.0, bins: int = 1000):
+        self.low = low
+        self.high = high
+        self.bins = bins
+        self.counts = [0] * bins
+        self.n = 0
+        self.min = None
+        self.max = None
+        self.total = 0.0
+
+    def add(self, value: float):
+        width = (self.high - self.low) / self.bins
+        idx = int((value - self.low) / width)
+        idx = min(max(idx, 0), self.bins - 1)
+        self.counts[idx] += 1
+        self.n += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other: "QuantileSketch"):
+        if (self.low, self.high, self.bins) != (other.low, other.high, other.bins):
+            raise ValueError("Cannot merge sketches with different ranges.")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.n += other.n
+        self.total += other.total
+        for v in (other.min, other.max):
+            if v is not None:
+                self.min = v if self.min is None else min(self.min, v)
+                self.max = v if self.max is None else max(self.max, v)
+        return self
+
+    def quantile(self, q: float):
+        if self.n == 0:
+            return None
+        width = (self.high - self.low) / self.bins
+        target = q * self.n
+        seen = 0
+        for idx, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= target:
+                # Midpoint of the bucket, clamped to the observed range
+                value = self.low + (idx + 0.5) * width
+                return round(min(max(value, self.min), self.max), 3)
+        return round(self.max, 3)
+
+    def mean(self):
+        return round(self.total / self.n, 3) if self.n else None
+
+
+class CorpusAggregator:
+    """
+    Streaming corpus-level summary of analyze_document results.
+    Memory stays constant regardless of corpus size; aggregators built
+    in separate worker processes can be combined with merge().
+    """
+
+    def __init__(self, top_k: int = 100):
+        self.documents = 0
+        self.top_manipulation = TopK(top_k)
+        self.quantiles = {
+            "cognitive_load": QuantileSketch(0, 100),
+            "manipulation_score": QuantileSketch(0, 100),
+            "emotional_volatility": QuantileSketch(0, 1),
+            "decision_ambiguity": QuantileSketch(0, 1),
+            "information_quality": QuantileSketch(0, 10000),
+        }
+        self.categories = {
+            "attention_drop": Counter(),
+            "dominant_emotion": Counter(),
+            "decision_ambiguity": Counter(),
+        }
+        # Sentence feature cache lookups made while analyzing these documents
+        self.cache = Counter()
+
+    def add(self, doc_id, result: dict):
+        cog = result["cog"]
+        manip = result["manip"]
+        emo = result["emo"]
+        dec = result["dec"]
+        qual = result["qual"]
+
+        self.documents += 1
+        self.top_manipulation.add(manip["score"], doc_id)
+
+        self.quantiles["cognitive_load"].add(cog["load"])
+        self.quantiles["manipulation_score"].add(manip["score"])
+        self.quantiles["emotional_volatility"].add(emo["volatility"])
+        self.quantiles["decision_ambiguity"].add(dec["ambiguity"])
+        self.quantiles["information_quality"].add(qual["quality"])
+
+        self.categories["attention_drop"][cog["attention_drop"]] += 1
+        self.categories["dominant_emotion"][emo["dominant"]] += 1
+        if dec["ambiguity"] > HIGH_AMBIGUITY:
+            ambiguity = "High"
+        elif dec["ambiguity"] > 0:
+            ambiguity = "Moderate"
+        else:
+            ambiguity = "None"
+        self.categories["decision_ambiguity"][ambiguity] += 1
+
+    def merge(self, other: "CorpusAggregator"):
+        self.documents += other.documents
+        self.top_manipulation.merge(other.top_manipulation)
+        for name, sketch in other.quantiles.items():
+            self.quantiles[name].merge(sketch)
+        for name, counter in other.categories.items():
+            self.categories[name].update(counter)
+        self.cache.update(other.cache)
+        return self
+
+    def summary(self, quantiles=(0.5, 0.9, 0.99)) -> dict:
+        n = max(self.documents, 1)
+        return {
+            "documents": self.documents,
+            "top_manipulation": self.top_manipulation.items(),
+            "quantiles": {
+                name: {
+                    "mean": sketch.mean(),
+                    **{f"p{round(q * 100)}": sketch.quantile(q) for q in quantiles}
+                }
+                for name, sketch in self.quantiles.items()
+            },
+            "categories": {
+                name: dict(counter) for name, counter in self.categories.items()
+            },
+            "high_ambiguity_share": round(
+                self.categories["decision_ambiguity"]["High"] / n, 4
+            ),
+            "sentence_cache": {
+                "hits": self.cache["hits"],
+                "misses": self.cache["misses"],
+                "hit_rate": round(
+                    self.cache["hits"] / max(self.cache["hits"] + self.cache["misses"], 1), 4
+                ),
+            },
+        }
+
+    def report(self, top: int = 10) -> str:
+        """Plain-text summary report."""
+        s = self.summary()
+        lines = [f"Documents analyzed: {s['documents']}", ""]
+
+        lines.append("Score distributions:")
+        for name, stats in s["quantiles"].items():
+            parts = ", ".join(f"{k}={v}" for k, v in stats.items())
+            lines.append(f"  {name}: {parts}")
+
+        lines.append("")
+        lines.append("Categories:")
+        for name, counts in s["categories"].items():
+            parts = ", ".join(f"{k}={v}" for k, v in sorted(counts.items()))
+            lines.append(f"  {name}: {parts}")
+        lines.append(
+            f"  share with high decision ambiguity: {s['high_ambiguity_share']:.2%}"
+        )
+
+        cache = s["sentence_cache"]
+        lines.append(
+            f"  sentence cache hit rate: {cache['hit_rate']:.2%} "
+            f"({cache['hits']} hits, {cache['misses']} misses)"
+        )
+
+        lines.append("")
+        lines.append(f"Top {top} by manipulation score:")
+        for doc_id, score in s["top_manipulation"][:top]:
+            lines.append(f"  {score:>6}  {doc_id}")
+
+        return "\n".join(lines)
+
+
+def _aggregate_batch(batch, top_k):
+    agg = CorpusAggregator(top_k)
+    before = SENTENCE_CACHE.stats()
+    for doc_id, text in batch:
+        agg.add(doc_id, analyze_document(text))
+    after = SENTENCE_CACHE.stats()
+    agg.cache["hits"] += after["hits"] - before["hits"]
+    agg.cache["misses"] += after["misses"] - before["misses"]
+    return agg
+
+
+def _batches(documents, size):
+    it = iter(documents)
+    while True:
+        batch = list(itertools.islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+def analyze_corpus(documents, processes: int = None, batch_size: int = 64,
+                   top_k: int = 100) -> CorpusAggregator:
+    """
+    Analyze an iterable of (doc_id, text) pairs and return the merged
+    CorpusAggregator. Documents are streamed in batches with a bounded
+    number in flight, so per-document results are never all held at once.
+    processes=1 runs in the current process.
+    With HCIIS_PROFILE set, each process writes its own profile
+    (see profiling.py).
+    """
+    total = CorpusAggregator(top_k)
+
+    if processes == 1:
+        for batch in _batches(documents, batch_size):
+            total.merge(_aggregate_batch(batch, top_k))
+        return total
+
+    workers = processes or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        max_in_flight = workers * 2
+        pending = set()
+        for batch in _batches(documents, batch_size):
+            if len(pending) >= max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    total.merge(future.result())
+            pending.add(pool.submit(_aggregate_batch, batch, top_k))
+
+        for future in pending:
+            total.merge(future.result())
+
+    return total
@@ -1,5 +1,6 @@
 import re
 from nlp_utils import get_sentences, get_words
+from sentence_cache import SENTENCE_CACHE
 
 # --- Explainable linguistic cues ---
 
@@ -51,13 +52,27 @@ VAGUE_PHRASES = {
 }
 
 
+def sentence_features(s: str) -> dict:
+    """Per-sentence cue counts, cached across documents."""
+    tokens = get_words(s)
+    s_words = set(w for w in tokens if w.isalpha())
+    s_lower = s.lower()
+
+    return {
+        "length": len(tokens),
+        "decision": bool(s_words & DECISION_VERBS),
+        "risk": sum(1 for r in RISK_TERMS if r in s_lower),
+        "ambiguity": sum(1 for a in AMBIGUOUS_TERMS if a in s_lower),
+        "vague": sum(1 for v in VAGUE_PHRASES if v in s_lower)
+    }
+
+
 def decision_risk(text: str) -> dict:
     """
     Explainable decision risk & ambiguity analysis.
     """
 
     sentences = get_sentences(text)
-    words = [w.lower() for w in get_words(text) if w.isalpha()]
 
     if not sentences:
         return {
@@ -72,15 +87,14 @@ def decision_risk(text: str) -> dict:
     vague_commitments = 0
 
     for s in sentences:
-        s_words = set(w.lower() for w in get_words(s) if w.isalpha())
-        s_lower = s.lower()
+        features = SENTENCE_CACHE.get("decision_risk", s, sentence_features)
 
-        if s_words & DECISION_VERBS:
+        if features["decision"]:
             decision_sentences += 1
 
-        risk_mentions += sum(1 for r in RISK_TERMS if r in s_lower)
-        ambiguity_markers += sum(1 for a in AMBIGUOUS_TERMS if a in s_lower)
-        vague_commitments += sum(1 for v in VAGUE_PHRASES if v in s_lower)
+        risk_mentions += features["risk"]
+        ambiguity_markers += features["ambiguity"]
+        vague_commitments += features["vague"]
 
     total_sentences = len(sentences)
 
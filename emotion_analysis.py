@@ -1,5 +1,6 @@
 from collections import Counter
 from nlp_utils import get_words, get_sentences
+from sentence_cache import SENTENCE_CACHE
 
 # ---------------- Emotion Lexicons (Explainable) ----------------
 
@@ -39,6 +40,28 @@ NEGATIVE_WORDS = {
 }
 
 
+def sentence_features(s: str) -> dict:
+    """
+    Per-sentence emotion and polarity counts, cached across documents.
+    Document counts are the sums of these.
+    """
+    tokens = get_words(s)
+    s_words = [w for w in tokens if w.isalpha()]
+    s_set = set(s_words)
+
+    return {
+        "length": len(tokens),
+        "words": len(s_words),
+        "emotions": {
+            emotion: sum(1 for w in s_words if w in lexicon)
+            for emotion, lexicon in EMOTION_LEXICON.items()
+        },
+        "positive": sum(1 for w in s_words if w in POSITIVE_WORDS),
+        "negative": sum(1 for w in s_words if w in NEGATIVE_WORDS),
+        "mixed": bool((s_set & POSITIVE_WORDS) and (s_set & NEGATIVE_WORDS))
+    }
+
+
 def emotion_analysis(text: str) -> dict:
     """
     Explainable emotion & tone analysis.
@@ -48,10 +71,13 @@ def emotion_analysis(text: str) -> dict:
     - Suppressed emotion signal
     """
 
-    words = [w.lower() for w in get_words(text) if w.isalpha()]
     sentences = get_sentences(text)
+    features = [
+        SENTENCE_CACHE.get("emotion_analysis", s, sentence_features)
+        for s in sentences
+    ]
 
-    if not words:
+    if not any(f["words"] for f in features):
         return {
             "dominant": "Neutral",
             "volatility": 0.0,
@@ -62,8 +88,8 @@ def emotion_analysis(text: str) -> dict:
     # ---------------- Count emotions ----------------
     emotion_counts = Counter()
 
-    for emotion, lexicon in EMOTION_LEXICON.items():
-        emotion_counts[emotion] = sum(1 for w in words if w in lexicon)
+    for emotion in EMOTION_LEXICON:
+        emotion_counts[emotion] = sum(f["emotions"][emotion] for f in features)
 
     dominant_emotion = (
         emotion_counts.most_common(1)[0][0]
@@ -72,15 +98,11 @@ def emotion_analysis(text: str) -> dict:
     )
 
     # ---------------- Polarity ----------------
-    positive_count = sum(1 for w in words if w in POSITIVE_WORDS)
-    negative_count = sum(1 for w in words if w in NEGATIVE_WORDS)
+    positive_count = sum(f["positive"] for f in features)
+    negative_count = sum(f["negative"] for f in features)
 
     # ---------------- Emotional Volatility ----------------
-    emotion_changes = 0
-    for s in sentences:
-        s_words = set(w.lower() for w in get_words(s) if w.isalpha())
-        if (s_words & POSITIVE_WORDS) and (s_words & NEGATIVE_WORDS):
-            emotion_changes += 1
+    emotion_changes = sum(1 for f in features if f["mixed"])
 
     volatility = round(
         emotion_changes / max(len(sentences), 1),
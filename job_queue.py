@@ -0,0 +1,454 @@
+"""
+Durable local job queue for large batch runs.
+
+Jobs live in a SQLite database, so a run can be stopped or crash at any
+point and resume where it left off. Worker processes claim a batch of jobs
+and start them one at a time; only a started job has a lease clock and
+uses up an attempt. A job whose worker dies or hangs past its lease is
+retried, and after max_attempts it is quarantined instead of blocking the
+run. Unstarted jobs of a dead worker go straight back to the queue.
+
+    python job_queue.py enqueue jobs.db docs/*.txt
+    python job_queue.py run jobs.db --workers 8
+    python job_queue.py status jobs.db
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import sqlite3
+import sys
+import time
+import uuid
+
+from pipeline import analyze_document
+from profiling import ENV_VAR, session_from_env
+from sentence_cache import SENTENCE_CACHE
+
+PENDING = "pending"
+LEASED = "leased"      # claimed by a worker, not started yet
+RUNNING = "running"    # started; attempts counted, lease clock running
+DONE = "done"
+QUARANTINED = "quarantined"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    doc_id TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_expires REAL,
+    result TEXT,
+    error TEXT,
+    updated_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, lease_expires);
+CREATE TABLE IF NOT EXISTS cache_stats (
+    run TEXT NOT NULL,
+    worker TEXT NOT NULL,
+    cache_hits INTEGER NOT NULL DEFAULT 0,
+    cache_misses INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL,
+    PRIMARY KEY (run, worker)
+);
+"""
+
+
+def read_file(source: str) -> str:
+    """Default document loader: source is a path to a UTF-8 text file."""
+    with open(source, encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+
+class JobQueue:
+    """SQLite-backed job queue. Open one JobQueue per process."""
+
+    def __init__(self, path: str, lease_timeout: float = 600, max_attempts: int = 3):
+        self.path = path
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max_attempts
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def enqueue(self, jobs) -> int:
+        """
+        Add (doc_id, source) pairs. Existing doc ids are left untouched,
+        so re-enqueueing a corpus after a crash is safe.
+        Returns the number of new jobs.
+        """
+        now = time.time()
+        before = self.conn.total_changes
+        self.conn.execute("BEGIN")
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO jobs (doc_id, source, updated_at) VALUES (?, ?, ?)",
+            ((doc_id, source, now) for doc_id, source in jobs)
+        )
+        self.conn.execute("COMMIT")
+        return self.conn.total_changes - before
+
+    def _reclaim(self, where: str, params: tuple, error: str):
+        """
+        Put running jobs matching where back in the queue, or quarantine
+        them if they used every attempt; claimed jobs that never started
+        are returned without using an attempt.
+        """
+        now = time.time()
+        self.conn.execute(
+            "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, "
+            "error = ?, worker = NULL, lease_expires = NULL, updated_at = ? "
+            f"WHERE status = ? AND {where}",
+            (self.max_attempts, QUARANTINED, PENDING, error, now, RUNNING) + params
+        )
+        self.conn.execute(
+            "UPDATE jobs SET status = ?, worker = NULL, updated_at = ? "
+            f"WHERE status = ? AND {where}",
+            (PENDING, now, LEASED) + params
+        )
+
+    def lease(self, worker: str, n: int = 1) -> list:
+        """
+        Claim up to n pending jobs for worker. Claiming neither counts an
+        attempt nor starts the lease clock; call start() for that.
+        Expired leases are handled by the supervisor in run(), which must
+        stop the stuck worker before its job is handed out again.
+        Returns [(doc_id, source), ...].
+        """
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = self.conn.execute(
+                "SELECT doc_id, source FROM jobs WHERE status = ? LIMIT ?",
+                (PENDING, n)
+            ).fetchall()
+            self.conn.executemany(
+                "UPDATE jobs SET status = ?, worker = ?, updated_at = ? WHERE doc_id = ?",
+                ((LEASED, worker, now, doc_id) for doc_id, _ in rows)
+            )
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return rows
+
+    def start(self, doc_id: str, worker: str) -> bool:
+        """
+        Mark a claimed job as started: counts the attempt and starts its
+        lease clock. Returns False if the job is no longer claimed by worker.
+        """
+        now = time.time()
+        return self.conn.execute(
+            "UPDATE jobs SET status = ?, attempts = attempts + 1, lease_expires = ?, "
+            "updated_at = ? WHERE doc_id = ? AND status = ? AND worker = ?",
+            (RUNNING, now + self.lease_timeout, now, doc_id, LEASED, worker)
+        ).rowcount == 1
+
+    def complete(self, doc_id: str, result: dict):
+        self.conn.execute(
+            "UPDATE jobs SET status = ?, result = ?, error = NULL, worker = NULL, "
+            "lease_expires = NULL, updated_at = ? WHERE doc_id = ?",
+            (DONE, json.dumps(result), time.time(), doc_id)
+        )
+
+    def fail(self, doc_id: str, worker: str, error: str):
+        """Return the job to the queue, or quarantine it if out of attempts."""
+        self._reclaim("doc_id = ? AND worker = ?", (doc_id, worker), error)
+
+    def release_worker(self, worker: str, error: str = "worker died") -> None:
+        """
+        Requeue everything held by a dead or killed worker right away: its
+        running job counts as a failed attempt, unstarted claims do not.
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._reclaim("worker = ?", (worker,), error)
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def recover(self) -> None:
+        """
+        Requeue jobs left claimed or running by an interrupted run and
+        reset the sentence cache stats of earlier runs.
+        Only call this when no workers are alive.
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._reclaim("1 = 1", (), "run interrupted")
+            self.conn.execute("DELETE FROM cache_stats")
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def expired_workers(self) -> set:
+        """Workers running a job past its lease (hung or stuck on a giant document)."""
+        rows = self.conn.execute(
+            "SELECT DISTINCT worker FROM jobs WHERE status = ? AND lease_expires < ?",
+            (RUNNING, time.time())
+        ).fetchall()
+        return {worker for (worker,) in rows}
+
+    def requeue_quarantined(self) -> int:
+        """Give quarantined jobs a fresh set of attempts."""
+        return self.conn.execute(
+            "UPDATE jobs SET status = ?, attempts = 0, updated_at = ? WHERE status = ?",
+            (PENDING, time.time(), QUARANTINED)
+        ).rowcount
+
+    def record_cache_stats(self, run: str, worker: str, hits: int, misses: int):
+        """
+        Add sentence cache lookups made by a worker since its last report.
+        Counts are added, not replaced, so a reused pid can't overwrite them.
+        """
+        self.conn.execute(
+            "INSERT INTO cache_stats (run, worker, cache_hits, cache_misses, updated_at) "
+            "VALUES (?, ?, ?, ?, ?) ON CONFLICT (run, worker) DO UPDATE SET "
+            "cache_hits = cache_hits + excluded.cache_hits, "
+            "cache_misses = cache_misses + excluded.cache_misses, "
+            "updated_at = excluded.updated_at",
+            (run, worker, hits, misses, time.time())
+        )
+
+    def progress(self) -> dict:
+        counts = {PENDING: 0, LEASED: 0, RUNNING: 0, DONE: 0, QUARANTINED: 0}
+        for status, count in self.conn.execute(
+            "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+        ):
+            counts[status] = count
+        counts["total"] = sum(counts.values())
+
+        hits, misses = self.conn.execute(
+            "SELECT COALESCE(SUM(cache_hits), 0), COALESCE(SUM(cache_misses), 0) "
+            "FROM cache_stats"
+        ).fetchone()
+        counts["cache_hit_rate"] = round(hits / max(hits + misses, 1), 4)
+        return counts
+
+    def remaining(self) -> int:
+        p = self.progress()
+        return p[PENDING] + p[LEASED] + p[RUNNING]
+
+    def leasable(self) -> int:
+        """Jobs a new worker could claim right now."""
+        (count,) = self.conn.execute(
+            "SELECT COUNT(*) FROM jobs WHERE status = ?", (PENDING,)
+        ).fetchone()
+        return count
+
+    def results(self):
+        """Yield (doc_id, result dict) for every completed job."""
+        for doc_id, result in self.conn.execute(
+            "SELECT doc_id, result FROM jobs WHERE status = ? ORDER BY doc_id", (DONE,)
+        ):
+            yield doc_id, json.loads(result)
+
+    def quarantined(self):
+        """Yield (doc_id, source, attempts, error) for poison documents."""
+        yield from self.conn.execute(
+            "SELECT doc_id, source, attempts, error FROM jobs WHERE status = ?",
+            (QUARANTINED,)
+        )
+
+
+def worker_loop(db_path: str, lease_timeout: float, max_attempts: int,
+                batch: int = 8, loader=read_file, analyze=analyze_document,
+                run_id: str = "", stats_every: int = 50):
+    """
+    Lease and process jobs until none are left.
+    Sentence cache stats are reported for run_id every stats_every jobs
+    and when the worker exits.
+    Profiled into $HCIIS_PROFILE/pid-<pid>/ when that variable is set.
+    """
+    # Turn terminate() into a normal exit so the profile and stats get written
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(1))
+    queue = JobQueue(db_path, lease_timeout, max_attempts)
+    worker = str(os.getpid())
+    session_from_env()
+    reporter = _CacheStatsReporter(queue, run_id, worker)
+    try:
+        _process_jobs(queue, worker, batch, loader, analyze, reporter, stats_every)
+    finally:
+        reporter.report()
+        queue.close()
+
+
+class _CacheStatsReporter:
+    """Sends the sentence cache lookups made since the last report."""
+
+    def __init__(self, queue, run_id: str, worker: str):
+        self.queue = queue
+        self.run_id = run_id
+        self.worker = worker
+        stats = SENTENCE_CACHE.stats()
+        self.reported = (stats["hits"], stats["misses"])
+
+    def report(self):
+        stats = SENTENCE_CACHE.stats()
+        hits, misses = stats["hits"], stats["misses"]
+        if (hits, misses) != self.reported:
+            self.queue.record_cache_stats(
+                self.run_id, self.worker,
+                hits - self.reported[0], misses - self.reported[1]
+            )
+            self.reported = (hits, misses)
+
+
+def _process_jobs(queue, worker, batch, loader, analyze, reporter, stats_every):
+    processed = 0
+    while True:
+        jobs = queue.lease(worker, batch)
+        if not jobs:
+            return
+        for doc_id, source in jobs:
+            if not queue.start(doc_id, worker):
+                continue
+            try:
+                result = analyze(loader(source))
+            except Exception as e:
+                queue.fail(doc_id, worker, f"{type(e).__name__}: {e}")
+            else:
+                queue.complete(doc_id, result)
+            processed += 1
+            if processed % stats_every == 0:
+                reporter.report()
+
+
+def _stop_worker(proc, grace: float = 10.0):
+    """Terminate a worker, giving it grace seconds to write its profile."""
+    proc.terminate()
+    proc.join(grace)
+    if proc.is_alive():
+        proc.kill()
+        proc.join()
+
+
+def run(db_path: str, workers: int = None, lease_timeout: float = 600,
+        max_attempts: int = 3, batch: int = 8, loader=read_file,
+        analyze=analyze_document, report_every: float = 10.0, log=print) -> dict:
+    """
+    Process every remaining job with a pool of worker processes.
+
+    Jobs left over from an interrupted run are requeued first. Workers
+    that die (e.g. OOM) are replaced, and workers stuck on a job past its
+    lease are terminated; either way their jobs are requeued at once, and
+    the job they were running is retried or quarantined.
+    Progress and throughput are logged every report_every seconds.
+    Returns the final progress counts.
+    """
+    workers = workers or os.cpu_count() or 1
+    queue = JobQueue(db_path, lease_timeout, max_attempts)
+    run_id = uuid.uuid4().hex
+    args = (db_path, lease_timeout, max_attempts, batch, loader, analyze, run_id)
+
+    queue.recover()
+    start = time.time()
+    done_at_start = queue.progress()[DONE]
+    procs = {}
+    last_report = start
+
+    try:
+        while True:
+            for pid, proc in list(procs.items()):
+                if not proc.is_alive():
+                    proc.join()
+                    del procs[pid]
+                    if proc.exitcode != 0:
+                        log(f"Worker {pid} died with exit code {proc.exitcode}")
+                    queue.release_worker(str(pid))
+
+            for worker in queue.expired_workers():
+                proc = procs.pop(int(worker), None)
+                if proc is not None:
+                    log(f"Terminating worker {worker}: lease expired")
+                    _stop_worker(proc)
+                queue.release_worker(worker, "lease expired")
+
+            if queue.remaining() == 0 and not procs:
+                break
+
+            # Keep the pool full while there is work that can be leased
+            while len(procs) < min(workers, queue.leasable()):
+                proc = multiprocessing.Process(target=worker_loop, args=args, daemon=True)
+                proc.start()
+                procs[proc.pid] = proc
+
+            now = time.time()
+            if now - last_report >= report_every:
+                last_report = now
+                log(_format_progress(queue.progress(), done_at_start, now - start))
+
+            time.sleep(0.5)
+    finally:
+        for proc in procs.values():
+            _stop_worker(proc)
+
+    final = queue.progress()
+    log(_format_progress(final, done_at_start, time.time() - start))
+    queue.close()
+    return final
+
+
+def _format_progress(p: dict, done_at_start: int, elapsed: float) -> str:
+    processed = p[DONE] - done_at_start
+    rate = processed / elapsed if elapsed > 0 else 0.0
+    return (
+        f"{p[DONE]}/{p['total']} done, {p[PENDING]} pending, "
+        f"{p[LEASED] + p[RUNNING]} in progress, "
+        f"{p[QUARANTINED]} quarantined | {rate:.1f} docs/s, "
+        f"sentence cache hit rate {p['cache_hit_rate']:.1%}"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HCIIS durable batch job queue")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_enqueue = sub.add_parser("enqueue", help="add text files as jobs")
+    p_enqueue.add_argument("db")
+    p_enqueue.add_argument("files", nargs="+")
+
+    p_run = sub.add_parser("run", help="process remaining jobs")
+    p_run.add_argument("db")
+    p_run.add_argument("--workers", type=int, default=None)
+    p_run.add_argument("--lease-timeout", type=float, default=600)
+    p_run.add_argument("--max-attempts", type=int, default=3)
+    p_run.add_argument("--batch", type=int, default=8)
+    p_run.add_argument("--profile", metavar="DIR", default=None,
+                       help="write per-worker CPU and allocation profiles to DIR")
+
+    p_status = sub.add_parser("status", help="show progress and poison documents")
+    p_status.add_argument("db")
+
+    p_retry = sub.add_parser("retry", help="requeue quarantined jobs")
+    p_retry.add_argument("db")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "enqueue":
+        queue = JobQueue(args.db)
+        added = queue.enqueue((os.path.abspath(f), os.path.abspath(f)) for f in args.files)
+        print(f"Enqueued {added} new jobs.")
+    elif args.command == "run":
+        if args.profile:
+            os.environ[ENV_VAR] = os.path.abspath(args.profile)
+        run(args.db, args.workers, args.lease_timeout, args.max_attempts, args.batch)
+    elif args.command == "status":
+        queue = JobQueue(args.db)
+        print(json.dumps(queue.progress(), indent=2))
+        for doc_id, _, attempts, error in queue.quarantined():
+            print(f"quarantined: {doc_id} ({attempts} attempts): {error}")
+    elif args.command == "retry":
+        print(f"Requeued {JobQueue(args.db).requeue_quarantined()} jobs.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
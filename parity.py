@@ -0,0 +1,382 @@
+"""
+Golden-score parity harness.
+
+Runs an engine (any callable text -> analyze_document-style dict) over the
+frozen reference corpus in parity_corpus/, compares every metric with the
+stored golden outputs and reports absolute/relative diffs and the speedup
+over the current pipeline. Golden outputs are produced by the baseline
+analyzers (REFERENCE_REV) and record the NLTK version and data hashes.
+
+    python parity.py                                 # check the current pipeline
+    python parity.py --freeze                        # (re)write golden.json
+                                                     # from the reference revision
+    python parity.py --engine mymodule:fast_analyze  # check an engine
+    python parity.py --engine mymodule:fast_analyze --rel-tol 0.01 \\
+        --tol dec.ambiguity=0.05
+"""
+import argparse
+import hashlib
+import importlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import nltk
+
+from pipeline import analyze_document
+from sentence_cache import SENTENCE_CACHE
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "parity_corpus")
+GOLDEN_FILE = os.path.join(CORPUS_DIR, "golden.json")
+
+# Baseline commit, before any performance work: golden.json was frozen
+# from here. Only needed to re-freeze, which requires this commit locally.
+REFERENCE_REV = "2510513f52f5008ecef3ab4e69ec9080f006db05"
+
+# NLTK data the analyzers depend on; their hashes are recorded in golden.json
+NLTK_RESOURCES = (
+    "tokenizers/punkt_tab/english",
+    "corpora/stopwords/english",
+)
+
+# Runs in a checkout of the reference revision, so it only uses modules
+# that existed there. The baseline nlp_utils downloads NLTK data on import;
+# that is skipped so the reference uses exactly the data recorded in the
+# golden file, and so freezing works offline.
+_REFERENCE_SCRIPT = """
+import json, sys
+import nltk
+nltk.download = lambda *args, **kwargs: True
+from nlp_utils import preprocess_text
+from cognitive_load import cognitive_load
+from manipulation_analysis import manipulation_score
+from emotion_analysis import emotion_analysis
+from decision_risk import decision_risk
+from info_quality import information_quality
+
+with open(sys.argv[1], encoding="utf-8") as f:
+    corpus = json.load(f)
+out = {}
+for doc_id, text in corpus.items():
+    t = preprocess_text(text)
+    out[doc_id] = {
+        "cog": cognitive_load(t),
+        "manip": manipulation_score(t),
+        "emo": emotion_analysis(t),
+        "dec": decision_risk(t),
+        "qual": information_quality(t),
+    }
+with open(sys.argv[2], "w", encoding="utf-8") as f:
+    json.dump(out, f)
+"""
+
+
+def load_corpus(corpus_dir: str = CORPUS_DIR) -> dict:
+    """Return {doc_id: text} for every .txt file in the corpus directory."""
+    corpus = {}
+    for name in sorted(os.listdir(corpus_dir)):
+        if name.endswith(".txt"):
+            with open(os.path.join(corpus_dir, name), encoding="utf-8") as f:
+                corpus[name[:-4]] = f.read()
+    return corpus
+
+
+def flatten(result: dict, prefix: str = "") -> dict:
+    """Flatten nested result dicts into {"dec.details.risk_mentions": 3, ...}."""
+    flat = {}
+    for key, value in result.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        else:
+            flat[name] = value
+    return flat
+
+
+def load_engine(spec: str):
+    """Resolve "module:function" to a callable."""
+    module_name, _, func_name = spec.partition(":")
+    return getattr(importlib.import_module(module_name), func_name or "analyze_document")
+
+
+def run_engine(engine, corpus: dict, repeat: int = 1):
+    """
+    Run engine over the corpus; return ({doc_id: flat result}, best seconds).
+    The sentence cache is cleared before each run so timings start cold.
+    """
+    best = None
+    for _ in range(repeat):
+        SENTENCE_CACHE.clear()
+        start = time.perf_counter()
+        results = {doc_id: flatten(engine(text)) for doc_id, text in corpus.items()}
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return results, best
+
+
+def _hash_path(path: str) -> str:
+    digest = hashlib.sha256()
+    if os.path.isdir(path):
+        for root, _, files in sorted(os.walk(path)):
+            for name in sorted(files):
+                with open(os.path.join(root, name), "rb") as f:
+                    digest.update(name.encode("utf-8"))
+                    digest.update(f.read())
+    else:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def environment() -> dict:
+    """NLTK version and data hashes that golden outputs depend on."""
+    data = {}
+    for resource in NLTK_RESOURCES:
+        try:
+            pointer = nltk.data.find(resource)
+        except LookupError:
+            data[resource] = None
+            continue
+        path = getattr(pointer, "path", str(pointer))
+        data[resource] = _hash_path(path) if os.path.exists(path) else str(pointer)
+    return {"nltk": nltk.__version__, "nltk_data": data}
+
+
+def corpus_hashes(corpus: dict) -> dict:
+    return {
+        doc_id: hashlib.sha256(text.encode("utf-8")).hexdigest()
+        for doc_id, text in corpus.items()
+    }
+
+
+def run_reference(corpus: dict, rev: str = REFERENCE_REV) -> dict:
+    """
+    Score the corpus with the analyzers as they were at git revision rev,
+    using a temporary worktree and the current interpreter and NLTK data.
+    """
+    repo = os.path.dirname(os.path.abspath(__file__))
+    found = subprocess.run(
+        ["git", "-C", repo, "rev-parse", "--verify", "--quiet", f"{rev}^{{commit}}"],
+        capture_output=True
+    )
+    if found.returncode != 0:
+        raise ValueError(
+            f"Reference revision {rev} is not in this repository; "
+            "fetch it or pass --rev."
+        )
+
+    tmp = tempfile.mkdtemp(prefix="hciis-ref-")
+    worktree = os.path.join(tmp, "ref")
+    subprocess.run(
+        ["git", "-C", repo, "worktree", "add", "--detach", worktree, rev],
+        check=True, capture_output=True
+    )
+    try:
+        corpus_file = os.path.join(tmp, "corpus.json")
+        out_file = os.path.join(tmp, "out.json")
+        with open(corpus_file, "w", encoding="utf-8") as f:
+            json.dump(corpus, f)
+        # Point the reference at the NLTK data this process uses
+        env = dict(os.environ, NLTK_DATA=os.pathsep.join(nltk.data.path))
+        subprocess.run(
+            [sys.executable, "-c", _REFERENCE_SCRIPT, corpus_file, out_file],
+            cwd=worktree, env=env, check=True
+        )
+        with open(out_file, encoding="utf-8") as f:
+            results = json.load(f)
+    finally:
+        subprocess.run(
+            ["git", "-C", repo, "worktree", "remove", "--force", worktree],
+            capture_output=True
+        )
+        shutil.rmtree(tmp, ignore_errors=True)
+    return {doc_id: flatten(result) for doc_id, result in results.items()}
+
+
+def freeze(rev: str = REFERENCE_REV, corpus_dir: str = CORPUS_DIR,
+           golden_file: str = GOLDEN_FILE) -> dict:
+    """
+    Write the reference revision's outputs for the corpus to the golden
+    file, together with the environment and corpus they were produced from.
+    """
+    corpus = load_corpus(corpus_dir)
+    golden = {
+        "meta": {
+            "reference_rev": rev,
+            "python": platform.python_version(),
+            **environment(),
+            "corpus": corpus_hashes(corpus),
+        },
+        "results": run_reference(corpus, rev),
+    }
+    with open(golden_file, "w", encoding="utf-8") as f:
+        json.dump(golden, f, indent=2, sort_keys=True)
+        f.write("\n")
+    return golden
+
+
+def environment_mismatches(meta: dict, corpus: dict) -> list:
+    """Differences between the golden file's recorded environment and now."""
+    problems = []
+    current = environment()
+    if meta.get("nltk") != current["nltk"]:
+        problems.append(f"nltk {current['nltk']} (golden: {meta.get('nltk')})")
+    for resource, digest in meta.get("nltk_data", {}).items():
+        if current["nltk_data"].get(resource) != digest:
+            problems.append(f"NLTK data {resource} differs")
+    if meta.get("corpus") != corpus_hashes(corpus):
+        problems.append("reference corpus differs from the frozen corpus")
+    return problems
+
+
+def compare(golden: dict, results: dict, abs_tol: float = 0.0,
+            rel_tol: float = 0.0, tolerances: dict = None) -> dict:
+    """
+    Compare engine results against golden outputs.
+
+    Numeric metrics pass when the absolute diff is within abs_tol or the
+    relative diff is within rel_tol; `tolerances` maps a metric name
+    (e.g. "dec.ambiguity") to its own (abs_tol, rel_tol). Text fields
+    (notes, summaries) must match exactly.
+
+    Returns {metric: {"max_abs", "max_rel", "mismatches", "ok"}}.
+    """
+    tolerances = tolerances or {}
+    report = {}
+
+    for doc_id, expected in golden.items():
+        actual = results.get(doc_id, {})
+        for metric in sorted(set(expected) | set(actual)):
+            entry = report.setdefault(
+                metric, {"max_abs": 0.0, "max_rel": 0.0, "mismatches": [], "ok": True}
+            )
+            m_abs, m_rel = tolerances.get(metric, (abs_tol, rel_tol))
+            exp = expected.get(metric)
+            got = actual.get(metric)
+
+            numeric = (
+                isinstance(exp, (int, float)) and isinstance(got, (int, float))
+                and not isinstance(exp, bool) and not isinstance(got, bool)
+            )
+            if numeric:
+                diff = abs(got - exp)
+                rel = diff / abs(exp) if exp else (0.0 if diff == 0 else float("inf"))
+                entry["max_abs"] = max(entry["max_abs"], diff)
+                entry["max_rel"] = max(entry["max_rel"], rel)
+                ok = diff <= m_abs or rel <= m_rel
+            else:
+                ok = exp == got
+
+            if not ok:
+                entry["ok"] = False
+                entry["mismatches"].append({"doc": doc_id, "expected": exp, "actual": got})
+
+    return report
+
+
+def format_report(report: dict, speedup: float = None, cache: dict = None) -> str:
+    lines = [f"{'metric':<40} {'max abs':>12} {'max rel':>10}  status"]
+    for metric, entry in sorted(report.items()):
+        status = "ok" if entry["ok"] else f"FAIL ({len(entry['mismatches'])} docs)"
+        lines.append(
+            f"{metric:<40} {entry['max_abs']:>12.6g} {entry['max_rel']:>10.4g}  {status}"
+        )
+    failed = [m for m, e in report.items() if not e["ok"]]
+    lines.append("")
+    if speedup is not None:
+        lines.append(f"Speedup vs current pipeline: {speedup:.2f}x")
+    if cache is not None:
+        lines.append(
+            f"Sentence cache hit rate (engine run): {cache['hit_rate']:.2%} "
+            f"({cache['hits']} hits, {cache['misses']} misses)"
+        )
+    lines.append(
+        "PARITY OK" if not failed else f"PARITY FAILED: {len(failed)} metric(s) out of tolerance"
+    )
+    return "\n".join(lines)
+
+
+def check(engine, abs_tol: float = 0.0, rel_tol: float = 0.0, tolerances: dict = None,
+          repeat: int = 3, corpus_dir: str = CORPUS_DIR, golden_file: str = GOLDEN_FILE):
+    """
+    Run engine against the golden outputs.
+    Returns (report, speedup, cache, mismatches); speedup is current
+    pipeline time / engine time, both measured now on this machine, cache
+    is the sentence cache stats of the last engine run, and mismatches
+    lists differences from the environment the golden file was frozen in.
+    """
+    with open(golden_file, encoding="utf-8") as f:
+        golden = json.load(f)
+    corpus = load_corpus(corpus_dir)
+    mismatches = environment_mismatches(golden["meta"], corpus)
+
+    _, ref_time = run_engine(analyze_document, corpus, repeat)
+    results, engine_time = run_engine(engine, corpus, repeat)
+
+    report = compare(golden["results"], results, abs_tol, rel_tol, tolerances)
+    speedup = ref_time / engine_time if engine_time else float("inf")
+    return report, speedup, SENTENCE_CACHE.stats(), mismatches
+
+
+def _parse_tolerance(spec: str):
+    metric, _, values = spec.partition("=")
+    abs_tol, _, rel_tol = values.partition(",")
+    return metric, (float(abs_tol), float(rel_tol or 0))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HCIIS golden-score parity harness")
+    parser.add_argument("--freeze", action="store_true",
+                        help="regenerate golden outputs from the reference revision")
+    parser.add_argument("--rev", default=REFERENCE_REV,
+                        help="git revision used by --freeze (default: baseline)")
+    parser.add_argument("--allow-env-mismatch", action="store_true",
+                        help="compare even if NLTK or the corpus differ from golden.json")
+    parser.add_argument("--engine", default="pipeline:analyze_document",
+                        help="engine to check, as module:function")
+    parser.add_argument("--abs-tol", type=float, default=0.0)
+    parser.add_argument("--rel-tol", type=float, default=0.0)
+    parser.add_argument("--tol", action="append", default=[], metavar="METRIC=ABS[,REL]",
+                        help="per-metric tolerance, e.g. dec.ambiguity=0.01")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="timing runs per engine (best is kept)")
+    args = parser.parse_args(argv)
+
+    if args.freeze:
+        try:
+            golden = freeze(args.rev)
+        except ValueError as e:
+            print(e)
+            return 2
+        print(
+            f"Wrote golden outputs for {len(golden['results'])} documents "
+            f"from {args.rev} to {GOLDEN_FILE}"
+        )
+        return 0
+
+    if not os.path.exists(GOLDEN_FILE):
+        print(f"No golden outputs at {GOLDEN_FILE}; run with --freeze first.")
+        return 2
+
+    tolerances = dict(_parse_tolerance(t) for t in args.tol)
+    report, speedup, cache, mismatches = check(
+        load_engine(args.engine), args.abs_tol, args.rel_tol, tolerances, args.repeat
+    )
+    for problem in mismatches:
+        print(f"Environment mismatch: {problem}")
+    if mismatches and not args.allow_env_mismatch:
+        print("Golden outputs were frozen in a different environment; "
+              "re-freeze or pass --allow-env-mismatch.")
+        return 3
+
+    print(format_report(report, speedup, cache))
+    return 0 if all(e["ok"] for e in report.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
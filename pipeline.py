@@ -0,0 +1,27 @@
+from nlp_utils import preprocess_text
+from cognitive_load import cognitive_load
+from manipulation_analysis import manipulation_score
+from emotion_analysis import emotion_analysis
+from decision_risk import decision_risk
+from info_quality import information_quality
+from profiling import session_from_env
+
+# Same keys as the Streamlit app and pdf_report arguments
+ANALYZERS = {
+    "cog": cognitive_load,
+    "manip": manipulation_score,
+    "emo": emotion_analysis,
+    "dec": decision_risk,
+    "qual": information_quality,
+}
+
+
+def analyze_document(text: str) -> dict:
+    """
+    Run all five analyzers on one document.
+    Returns a dict keyed by analyzer ("cog", "manip", "emo", "dec", "qual").
+    Profiled when HCIIS_PROFILE is set (see profiling.py).
+    """
+    session_from_env()
+    clean_text = preprocess_text(text)
+    return {key: analyzer(clean_text) for key, analyzer in ANALYZERS.items()}
@@ -0,0 +1,422 @@
+"""
+Deep profiling mode: CPU and allocation profiles per analyzer.
+
+Wraps a run in cProfile, a stack sampler and tracemalloc, and writes to
+an output directory:
+
+    profile.prof       cProfile stats (open with pstats / snakeviz)
+    stacks.collapsed   sampled stacks with line numbers, for flamegraph.pl
+                       or speedscope
+    memory.txt         peak memory and top allocation sites per analyzer
+    summary.json       per-analyzer timings, function stats and allocations,
+                       used by `compare`
+
+Output is written when the profiled process exits (job queue workers
+terminated on lease expiry included) and every flush_interval seconds
+while it runs, so even a process that is killed outright leaves its
+sampled stacks and allocation sites behind.
+
+Functions are keyed by file and qualified name, so `compare` still
+matches them after code above them moves; line numbers are display only.
+
+Setting HCIIS_PROFILE=DIR profiles every process that calls
+pipeline.analyze_document, corpus_stats.analyze_corpus or a job queue
+worker, each into DIR/pid-<pid>/. `job_queue.py run --profile DIR` sets it
+for you. Or run it directly:
+
+    python profiling.py run doc.txt --out prof/
+    python profiling.py compare prof_old/summary.json prof_new/summary.json
+"""
+import argparse
+import atexit
+import cProfile
+import functools
+import json
+import multiprocessing.util
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+ENV_VAR = "HCIIS_PROFILE"
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Profiler currently running in this process, if any
+_ACTIVE = None
+
+
+def _frame_label(filename: str, func: str, lineno: int) -> str:
+    return f"{os.path.basename(filename)}:{func}:{lineno}"
+
+
+def _function_key(code):
+    """
+    Stable key for a profiled function: file and qualified name, without
+    the line number, so edits above a function keep its key. Returns
+    (key, line) where line is kept for display only.
+    """
+    if isinstance(code, str):
+        return f"~:{code}", 0
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{os.path.basename(code.co_filename)}:{name}", code.co_firstlineno
+
+
+@functools.lru_cache(maxsize=None)
+def _is_repo_file(filename: str) -> bool:
+    return (
+        os.path.dirname(os.path.abspath(filename)) == REPO_DIR
+        and os.path.abspath(filename) != os.path.abspath(__file__)
+    )
+
+
+class Profiler:
+    """
+    Profiles every analyzer call made while active.
+
+    Analyzers in pipeline.ANALYZERS are wrapped for the duration, so time,
+    peak memory and allocation sites are attributed to each analyzer.
+    Use as a context manager, or call start() and stop().
+    """
+
+    def __init__(self, out_dir: str, interval: float = 0.001, nframes: int = 25,
+                 top: int = 25, flush_interval: float = 30.0):
+        self.out_dir = out_dir
+        self.interval = interval
+        self.nframes = nframes
+        self.top = top
+        self.flush_interval = flush_interval
+        self.pid = os.getpid()
+
+        self.profile = cProfile.Profile()
+        self.stacks = Counter()
+        self.wall = Counter()
+        self.calls = Counter()
+        self.peak = Counter()
+        self.peak_snapshots = {}
+        self._sites = {}
+        self.current = None
+
+        self._originals = None
+        self._lock = threading.Lock()
+        # The sampler thread and the profiled thread both write output
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = None
+        self._thread_id = None
+        self._last_flush = 0.0
+
+    # ---------------- Analyzer wrapping ----------------
+
+    def _wrap(self, key, analyzer):
+        def wrapped(text):
+            self.current = key
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            start = time.perf_counter()
+            try:
+                return analyzer(text)
+            finally:
+                self.wall[key] += time.perf_counter() - start
+                self.calls[key] += 1
+                peak = tracemalloc.get_traced_memory()[1] - baseline
+                self.peak[key] = max(self.peak[key], peak)
+                self.current = None
+                if time.monotonic() - self._last_flush >= self.flush_interval:
+                    try:
+                        self.flush()
+                    except Exception as e:
+                        # Never let profiling output fail the analysis
+                        self._write_failed(e)
+        return wrapped
+
+    # ---------------- Stack sampling ----------------
+
+    def _sample(self):
+        last_write = time.monotonic()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is not None:
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(_frame_label(code.co_filename, code.co_name, frame.f_lineno))
+                    frame = frame.f_back
+                with self._lock:
+                    self.stacks[";".join(reversed(stack))] += 1
+
+            # Keep the allocation snapshot closest to each analyzer's peak
+            key = self.current
+            if key is not None:
+                traced = tracemalloc.get_traced_memory()[0]
+                best = self.peak_snapshots.get(key)
+                # Snapshots are costly; only retake after 10% growth
+                if best is None or traced > best[0] * 1.1:
+                    self.peak_snapshots[key] = (traced, tracemalloc.take_snapshot())
+
+            # Stacks and allocations don't need cProfile, so they can be
+            # written from here even while an analyzer call never returns
+            if time.monotonic() - last_write >= self.flush_interval:
+                last_write = time.monotonic()
+                try:
+                    with self._write_lock:
+                        self._write_stacks()
+                        self._write_memory()
+                except Exception as e:
+                    self._write_failed(e)
+
+    # ---------------- Lifecycle ----------------
+
+    def start(self):
+        global _ACTIVE
+        import pipeline
+
+        self._originals = dict(pipeline.ANALYZERS)
+        for key, analyzer in self._originals.items():
+            pipeline.ANALYZERS[key] = self._wrap(key, analyzer)
+
+        self._thread_id = threading.get_ident()
+        self._last_flush = time.monotonic()
+        tracemalloc.start(self.nframes)
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+        self._sampler.start()
+        self.profile.enable()
+        _ACTIVE = self
+        return self
+
+    def stop(self):
+        global _ACTIVE
+        import pipeline
+
+        if _ACTIVE is not self:
+            return
+        _ACTIVE = None
+        self.profile.disable()
+        self._stop.set()
+        self._sampler.join()
+        pipeline.ANALYZERS.update(self._originals)
+        # Snapshots are already taken; analyzing them untraced is much faster
+        tracemalloc.stop()
+        self.write()
+
+    def flush(self):
+        """Write everything so far. Call from the profiled thread."""
+        self.profile.disable()
+        try:
+            self.write()
+        finally:
+            self._last_flush = time.monotonic()
+            self.profile.enable()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    # ---------------- Reports ----------------
+
+    def _allocation_sites(self, snapshot) -> list:
+        """
+        Top allocation sites of a snapshot, each attributed to the innermost
+        frame in this repo (an analyzer or nlp_utils), not library internals.
+        """
+        # The profiler's own allocations (sampler thread, input text)
+        own = {__file__, threading.__file__, tracemalloc.__file__}
+        sites = Counter()
+        for stat in snapshot.statistics("traceback"):
+            # Tracebacks run from the oldest frame to the most recent one
+            frames = list(reversed(stat.traceback))
+            if frames[0].filename in own:
+                continue
+            frame = next(
+                (f for f in frames if _is_repo_file(f.filename)),
+                frames[0]
+            )
+            sites[f"{os.path.basename(frame.filename)}:{frame.lineno}"] += stat.size
+        return sites.most_common(self.top)
+
+    def _top_allocations(self, key) -> list:
+        # Flushes happen often; only analyze a snapshot once
+        if key not in self.peak_snapshots:
+            return []
+        snapshot = self.peak_snapshots[key][1]
+        cached = self._sites.get(key)
+        if cached is None or cached[0] is not snapshot:
+            cached = (snapshot, self._allocation_sites(snapshot))
+            self._sites[key] = cached
+        return cached[1]
+
+    def _function_stats(self) -> dict:
+        functions = {}
+        for entry in self.profile.getstats():
+            key, line = _function_key(entry.code)
+            stats = functions.setdefault(
+                key, {"ncalls": 0, "tottime": 0.0, "cumtime": 0.0, "line": line}
+            )
+            stats["ncalls"] += entry.callcount
+            stats["tottime"] += entry.inlinetime
+            stats["cumtime"] += entry.totaltime
+        for stats in functions.values():
+            stats["tottime"] = round(stats["tottime"], 6)
+            stats["cumtime"] = round(stats["cumtime"], 6)
+        return functions
+
+    def _analyzer_summary(self) -> dict:
+        return {
+            key: {
+                "calls": self.calls[key],
+                "wall": round(self.wall[key], 6),
+                "peak_bytes": self.peak[key],
+                "top_allocations": self._top_allocations(key),
+            }
+            for key in self._originals
+        }
+
+    def summary(self) -> dict:
+        with self._lock:
+            samples = sum(self.stacks.values())
+        return {
+            "analyzers": self._analyzer_summary(),
+            "functions": self._function_stats(),
+            "samples": samples,
+        }
+
+    def _write_failed(self, error: Exception):
+        print(f"profiling: could not write to {self.out_dir}: {error}", file=sys.stderr)
+
+    def _write_file(self, name: str, text: str):
+        # Write then rename, so a reader (or a kill) never sees half a file
+        os.makedirs(self.out_dir, exist_ok=True)
+        path = os.path.join(self.out_dir, name)
+        with open(path + ".tmp", "w") as f:
+            f.write(text)
+        os.replace(path + ".tmp", path)
+
+    def _write_stacks(self):
+        with self._lock:
+            stacks = self.stacks.most_common()
+        self._write_file(
+            "stacks.collapsed", "".join(f"{stack} {count}\n" for stack, count in stacks)
+        )
+
+    def _write_memory(self, analyzers: dict = None):
+        analyzers = analyzers or self._analyzer_summary()
+        lines = []
+        for key, entry in analyzers.items():
+            running = " (running)" if key == self.current else ""
+            lines.append(
+                f"{key}{running}: {entry['calls']} calls, {entry['wall']:.3f}s, "
+                f"peak {entry['peak_bytes'] / 1024:.1f} KiB"
+            )
+            for site, size in entry["top_allocations"]:
+                lines.append(f"    {size / 1024:>10.1f} KiB  {site}")
+        self._write_file("memory.txt", "\n".join(lines) + "\n")
+
+    def write(self):
+        with self._write_lock:
+            os.makedirs(self.out_dir, exist_ok=True)
+            self.profile.dump_stats(os.path.join(self.out_dir, "profile.prof"))
+            self._write_stacks()
+
+            summary = self.summary()
+            self._write_file("summary.json", json.dumps(summary, indent=2))
+            self._write_memory(summary["analyzers"])
+
+
+def session_from_env():
+    """
+    Start profiling this process into $HCIIS_PROFILE/pid-<pid>/ if the
+    variable is set. Idempotent: returns the running Profiler (or None
+    when profiling is off). Output is written every flush interval and
+    when the process exits, including multiprocessing workers.
+    """
+    global _ACTIVE
+    out_dir = os.environ.get(ENV_VAR)
+    if not out_dir:
+        return None
+    if _ACTIVE is not None and _ACTIVE.pid == os.getpid():
+        return _ACTIVE
+
+    if _ACTIVE is not None:
+        # Inherited through fork: its sampler thread is gone, so undo its
+        # analyzer wrappers and start a fresh profiler for this process
+        import pipeline
+        _ACTIVE.profile.disable()
+        pipeline.ANALYZERS.update(_ACTIVE._originals)
+        _ACTIVE = None
+
+    profiler = Profiler(os.path.join(out_dir, f"pid-{os.getpid()}")).start()
+    atexit.register(profiler.stop)
+    # multiprocessing children skip atexit but run these finalizers
+    multiprocessing.util.Finalize(None, profiler.stop, exitpriority=10)
+    return profiler
+
+
+def compare(old: dict, new: dict, top: int = 20) -> str:
+    """Report per-analyzer and per-function changes between two summaries."""
+    lines = ["Analyzers (wall seconds, peak KiB):"]
+    for key in sorted(set(old["analyzers"]) | set(new["analyzers"])):
+        a = old["analyzers"].get(key, {"wall": 0, "peak_bytes": 0})
+        b = new["analyzers"].get(key, {"wall": 0, "peak_bytes": 0})
+        change = (b["wall"] - a["wall"]) / a["wall"] * 100 if a["wall"] else 0.0
+        lines.append(
+            f"  {key:<6} {a['wall']:>9.3f} -> {b['wall']:>9.3f} ({change:+.1f}%)   "
+            f"{a['peak_bytes'] / 1024:>9.1f} -> {b['peak_bytes'] / 1024:>9.1f}"
+        )
+
+    empty = {"tottime": 0.0, "line": 0}
+    deltas = []
+    for func in set(old["functions"]) | set(new["functions"]):
+        a = old["functions"].get(func, empty)
+        b = new["functions"].get(func, empty)
+        line = b.get("line") or a.get("line")
+        label = f"{func} (line {line})" if line else func
+        deltas.append((b["tottime"] - a["tottime"], a["tottime"], b["tottime"], label))
+    deltas.sort(key=lambda d: abs(d[0]), reverse=True)
+
+    lines.append("")
+    lines.append(f"Largest self-time changes (top {top}):")
+    for delta, a, b, func in deltas[:top]:
+        lines.append(f"  {delta:>+9.4f}s  {a:>9.4f} -> {b:>9.4f}  {func}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HCIIS deep profiling")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_run = sub.add_parser("run", help="profile analysis of text files")
+    p_run.add_argument("files", nargs="+")
+    p_run.add_argument("--out", default="profile")
+    p_run.add_argument("--interval", type=float, default=0.001,
+                       help="stack sampling interval in seconds")
+
+    p_compare = sub.add_parser("compare", help="compare two summary.json files")
+    p_compare.add_argument("old")
+    p_compare.add_argument("new")
+    p_compare.add_argument("--top", type=int, default=20)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        import pipeline
+
+        with Profiler(args.out, interval=args.interval):
+            for path in args.files:
+                with open(path, encoding="utf-8", errors="replace") as f:
+                    pipeline.analyze_document(f.read())
+        print(f"Profile written to {args.out}/")
+    else:
+        with open(args.old) as f:
+            old = json.load(f)
+        with open(args.new) as f:
+            new = json.load(f)
+        print(compare(old, new, args.top))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+def sentence_key(namespace: str, sentence: str) -> bytes:
+    """
+    Hash of the normalized sentence. Analyzer features are case-insensitive,
+    so sentences differing only in case or surrounding whitespace share a key.
+    """
+    normalized = f"{namespace}\x00{sentence.strip().lower()}"
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).digest()
+
+
+class SentenceFeatureCache:
+    """
+    Bounded LRU cache of per-sentence features.
+    Boilerplate (legal notices, disclaimers, cookie banners) repeats word
+    for word across documents, so its features are computed only once.
+    """
+
+    def __init__(self, maxsize: int = 100000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str, sentence: str, compute):
+        """Return cached features for sentence, calling compute(sentence) on a miss."""
+        key = sentence_key(namespace, sentence)
+        with self._lock:
+            features = self._data.get(key)
+            if features is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return features
+            self.misses += 1
+
+        features = compute(sentence)
+
+        with self._lock:
+            self._data[key] = features
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return features
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# Shared by the analyzers; use SENTENCE_CACHE.stats() to check hit rates
+SENTENCE_CACHE = SentenceFeatureCache()
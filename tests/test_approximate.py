@@ -0,0 +1,34 @@
+import time
+
+from approximate import METRICS, approximate_analysis
+from pipeline import analyze_document
+
+TEXT = (
+    "You must act now.\n\n  Experts   agree this is the only safe choice.\n"
+    "We may change these terms at our\n  discretion. Failure to comply could "
+    "result in penalties. The report was published today. "
+)
+
+
+def test_small_documents_match_the_pipeline():
+    approx = approximate_analysis(TEXT)
+    exact = analyze_document(TEXT)
+    assert approx["exact"]
+    for key, fields in METRICS.items():
+        for field in fields:
+            assert approx["estimates"][key][field]["estimate"] == exact[key][field]
+
+
+def test_time_budget_stops_doubling():
+    text = TEXT * 1500
+    start = time.perf_counter()
+    result = approximate_analysis(text, sample_size=100, time_budget=0.05)
+    elapsed = time.perf_counter() - start
+
+    assert not result["exact"]
+    assert result["sample_size"] < 5000
+    assert elapsed < 5
+    for key, fields in METRICS.items():
+        for field in fields:
+            entry = result["estimates"][key][field]
+            assert entry["low"] <= entry["high"]
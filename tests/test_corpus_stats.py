@@ -0,0 +1,109 @@
+import random
+
+from corpus_stats import CorpusAggregator, QuantileSketch, TopK, analyze_corpus
+
+
+def _result(score, load=50.0, volatility=0.1, ambiguity=0.5, quality=5000.0):
+    return {
+        "cog": {"load": load, "attention_drop": "Low"},
+        "manip": {"score": score},
+        "emo": {"volatility": volatility, "dominant": "Fear"},
+        "dec": {"ambiguity": ambiguity},
+        "qual": {"quality": quality},
+    }
+
+
+def test_topk_keeps_highest_scores():
+    top = TopK(3)
+    for doc_id, score in [("a", 1), ("b", 5), ("c", 3), ("d", 4), ("e", 2)]:
+        top.add(score, doc_id)
+    assert top.items() == [("b", 5), ("d", 4), ("c", 3)]
+
+
+def test_topk_ties_do_not_depend_on_merge_order():
+    scores = [(f"doc{i:02d}", i % 3) for i in range(30)]
+
+    single = TopK(5)
+    for doc_id, score in scores:
+        single.add(score, doc_id)
+
+    for seed in range(5):
+        shuffled = scores[:]
+        random.Random(seed).shuffle(shuffled)
+        parts = [TopK(5) for _ in range(3)]
+        for i, (doc_id, score) in enumerate(shuffled):
+            parts[i % 3].add(score, doc_id)
+        merged = TopK(5)
+        for part in reversed(parts) if seed % 2 else parts:
+            merged.merge(part)
+        assert merged.items() == single.items()
+
+
+def test_quantile_sketch_merge_matches_single_sketch():
+    rng = random.Random(0)
+    values = [rng.uniform(0, 100) for _ in range(1000)]
+    single = QuantileSketch(0, 100)
+    left, right = QuantileSketch(0, 100), QuantileSketch(0, 100)
+    for i, v in enumerate(values):
+        single.add(v)
+        (left if i % 2 else right).add(v)
+
+    merged = left.merge(right)
+    assert merged.counts == single.counts
+    assert (merged.n, merged.min, merged.max) == (single.n, single.min, single.max)
+    assert merged.mean() == single.mean()
+    for q in (0.1, 0.5, 0.9, 0.99):
+        assert merged.quantile(q) == single.quantile(q)
+
+
+def test_quantile_sketch_merge_into_empty_and_range_mismatch():
+    sketch = QuantileSketch(0, 1)
+    sketch.add(0.25)
+    empty = QuantileSketch(0, 1).merge(sketch)
+    assert (empty.n, empty.min, empty.max) == (1, 0.25, 0.25)
+
+    try:
+        QuantileSketch(0, 1).merge(QuantileSketch(0, 100))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("merging different ranges should fail")
+
+
+def test_corpus_aggregator_merge_matches_single_aggregator():
+    results = [
+        (f"doc{i}", _result(score=i % 4 * 10, load=i, ambiguity=(i % 3) * 0.3))
+        for i in range(20)
+    ]
+    single = CorpusAggregator(top_k=5)
+    parts = [CorpusAggregator(top_k=5) for _ in range(3)]
+    for i, (doc_id, result) in enumerate(results):
+        single.add(doc_id, result)
+        parts[i % 3].add(doc_id, result)
+    parts[0].cache.update(hits=3, misses=1)
+    parts[2].cache.update(hits=1, misses=3)
+
+    merged = CorpusAggregator(top_k=5)
+    for part in parts:
+        merged.merge(part)
+
+    summary = merged.summary()
+    assert summary["sentence_cache"] == {"hits": 4, "misses": 4, "hit_rate": 0.5}
+    del summary["sentence_cache"]
+    expected = single.summary()
+    del expected["sentence_cache"]
+    assert summary == expected
+
+
+def test_analyze_corpus_same_top_list_for_any_process_count():
+    texts = [
+        "You must act now. Experts agree this is the only safe choice.",
+        "The weather was mild today.",
+        "Failure to comply may result in penalties. Act immediately!",
+    ]
+    docs = [(f"doc{i:02d}", texts[i % len(texts)]) for i in range(24)]
+
+    single = analyze_corpus(docs, processes=1, batch_size=4, top_k=5).summary()
+    pooled = analyze_corpus(docs, processes=3, batch_size=4, top_k=5).summary()
+    assert pooled["top_manipulation"] == single["top_manipulation"]
+    assert pooled["quantiles"] == single["quantiles"]
@@ -0,0 +1,145 @@
+import time
+
+import job_queue
+from job_queue import JobQueue, PENDING, LEASED, RUNNING, DONE, QUARANTINED
+
+
+def _identity(source):
+    return source
+
+
+def _slow_analyze(text):
+    if text == "poison":
+        time.sleep(60)
+    time.sleep(0.2)
+    return {"text": text}
+
+
+def _failing_analyze(text):
+    if text == "poison":
+        raise MemoryError("too big")
+    return {"text": text}
+
+
+def _job(queue, doc_id):
+    return queue.conn.execute(
+        "SELECT status, attempts FROM jobs WHERE doc_id = ?", (doc_id,)
+    ).fetchone()
+
+
+def _make_queue(tmp_path, docs, **kwargs):
+    queue = JobQueue(str(tmp_path / "jobs.db"), **kwargs)
+    queue.enqueue((d, d) for d in docs)
+    return queue
+
+
+def test_enqueue_is_idempotent(tmp_path):
+    queue = _make_queue(tmp_path, ["a", "b"])
+    assert queue.enqueue([("a", "a"), ("c", "c")]) == 1
+    assert queue.progress()["total"] == 3
+
+
+def test_claimed_jobs_do_not_expire_or_use_attempts(tmp_path):
+    queue = _make_queue(tmp_path, ["a", "b", "c"], lease_timeout=0.05)
+    assert len(queue.lease("w1", 3)) == 3
+    time.sleep(0.1)
+
+    assert queue.expired_workers() == set()
+    assert {_job(queue, d) for d in "abc"} == {(LEASED, 0)}
+
+
+def test_expired_job_is_retried_and_batch_mates_released_free(tmp_path):
+    queue = _make_queue(tmp_path, ["a", "b", "c"], lease_timeout=0.05)
+    queue.lease("w1", 3)
+    assert queue.start("a", "w1")
+    time.sleep(0.1)
+
+    assert queue.expired_workers() == {"w1"}
+    queue.release_worker("w1", "lease expired")
+
+    assert _job(queue, "a") == (PENDING, 1)
+    assert _job(queue, "b") == (PENDING, 0)
+    assert _job(queue, "c") == (PENDING, 0)
+
+
+def test_start_fails_once_claim_is_released(tmp_path):
+    queue = _make_queue(tmp_path, ["a"])
+    queue.lease("w1")
+    queue.release_worker("w1")
+    assert not queue.start("a", "w1")
+
+
+def test_poison_job_is_quarantined_after_max_attempts(tmp_path):
+    queue = _make_queue(tmp_path, ["poison"], max_attempts=2)
+    for _ in range(2):
+        assert queue.lease("w1") == [("poison", "poison")]
+        queue.start("poison", "w1")
+        queue.fail("poison", "w1", "MemoryError: too big")
+
+    assert _job(queue, "poison") == (QUARANTINED, 2)
+    assert queue.lease("w1") == []
+    assert [q[0] for q in queue.quarantined()] == ["poison"]
+
+
+def test_resume_after_interrupted_run(tmp_path):
+    queue = _make_queue(tmp_path, ["a", "b", "c", "d"])
+    queue.lease("w1", 2)
+    queue.start("a", "w1")
+    queue.complete("a", {"text": "a"})
+    queue.start("b", "w1")
+    queue.close()
+
+    # A fresh process picks up where the crashed run stopped
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    assert queue.enqueue([("a", "a"), ("b", "b")]) == 0
+    final = job_queue.run(
+        queue.path, workers=2, loader=_identity, analyze=_failing_analyze,
+        report_every=60, log=lambda msg: None
+    )
+
+    assert final[DONE] == 4
+    assert _job(queue, "a") == (DONE, 1)
+    assert _job(queue, "b") == (DONE, 2)
+    assert dict(queue.results())["d"] == {"text": "d"}
+
+
+def test_run_kills_hung_worker_without_penalizing_healthy_jobs(tmp_path):
+    docs = [f"d{i}" for i in range(8)] + ["poison"]
+    queue = _make_queue(tmp_path, docs)
+    final = job_queue.run(
+        queue.path, workers=2, lease_timeout=0.5, max_attempts=2, batch=8,
+        loader=_identity, analyze=_slow_analyze, report_every=60,
+        log=lambda msg: None
+    )
+
+    assert final[DONE] == 8
+    assert final[QUARANTINED] == 1
+    assert final[RUNNING] == 0
+    for doc_id in docs[:-1]:
+        assert _job(queue, doc_id) == (DONE, 1)
+    assert _job(queue, "poison") == (QUARANTINED, 2)
+
+
+def test_cache_stats_accumulate_and_reset_on_recover(tmp_path):
+    queue = _make_queue(tmp_path, ["a"])
+    queue.record_cache_stats("run1", "101", hits=3, misses=1)
+    # A later report from the same (or a reused) pid adds to the counts
+    queue.record_cache_stats("run1", "101", hits=1, misses=3)
+    queue.record_cache_stats("run1", "102", hits=0, misses=0)
+    assert queue.progress()["cache_hit_rate"] == 0.5
+
+    queue.recover()
+    assert queue.progress()["cache_hit_rate"] == 0.0
+
+
+def test_run_reports_cache_stats_of_the_current_run_only(tmp_path):
+    queue = _make_queue(tmp_path, ["a", "b", "c"])
+    queue.record_cache_stats("old-run", "101", hits=1000, misses=0)
+    final = job_queue.run(
+        queue.path, workers=1, loader=_identity, analyze=_failing_analyze,
+        report_every=60, log=lambda msg: None
+    )
+
+    assert final[DONE] == 3
+    # _failing_analyze never touches the sentence cache
+    assert final["cache_hit_rate"] == 0.0
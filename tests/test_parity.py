@@ -0,0 +1,18 @@
+import json
+
+import pytest
+
+import parity
+from pipeline import analyze_document
+
+
+def test_pipeline_matches_golden_outputs():
+    with open(parity.GOLDEN_FILE, encoding="utf-8") as f:
+        meta = json.load(f)["meta"]
+    mismatches = parity.environment_mismatches(meta, parity.load_corpus())
+    if mismatches:
+        pytest.skip("golden.json was frozen elsewhere: " + "; ".join(mismatches))
+
+    report, _, _, _ = parity.check(analyze_document, repeat=1)
+    failed = {metric: entry["mismatches"] for metric, entry in report.items() if not entry["ok"]}
+    assert not failed
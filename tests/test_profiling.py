@@ -0,0 +1,60 @@
+import json
+import subprocess
+import sys
+
+import parity
+import pipeline
+import profiling
+
+
+def test_frequent_flushes_keep_sampling_and_analysis_working(tmp_path, capsys):
+    corpus = {
+        doc_id: text for doc_id, text in parity.load_corpus().items()
+        if doc_id in ("boilerplate_01", "boilerplate_02", "boilerplate_03")
+    }
+    expected = {doc_id: pipeline.analyze_document(text) for doc_id, text in corpus.items()}
+
+    # Both threads flush about every 20ms, so their writes overlap
+    profiler = profiling.Profiler(str(tmp_path), flush_interval=0.02)
+    with profiler:
+        for doc_id, text in corpus.items():
+            assert pipeline.analyze_document(text) == expected[doc_id]
+        assert profiler._sampler.is_alive()
+
+    assert "could not write" not in capsys.readouterr().err
+    assert {p.name for p in tmp_path.iterdir()} == {
+        "profile.prof", "stacks.collapsed", "summary.json", "memory.txt"
+    }
+    summary = json.loads((tmp_path / "summary.json").read_text())
+    assert summary["analyzers"]["cog"]["calls"] == len(corpus)
+
+
+def test_write_errors_do_not_fail_the_analysis(tmp_path, capsys):
+    blocker = tmp_path / "not-a-dir"
+    blocker.write_text("")
+    profiler = profiling.Profiler(str(blocker / "out"), flush_interval=0.0).start()
+    try:
+        profiler._stop.wait(0.05)
+        assert pipeline.analyze_document("You must act now.")["cog"]
+        assert profiler._sampler.is_alive()
+    finally:
+        # The final write in stop() would raise; only the flushes are tested
+        profiler.write = lambda: None
+        profiler.stop()
+    assert "could not write" in capsys.readouterr().err
+
+
+def test_compare_does_not_load_the_analyzers(tmp_path):
+    summary = {"analyzers": {}, "functions": {"x.py:f": {"tottime": 1.0, "line": 3}}}
+    for name in ("a.json", "b.json"):
+        (tmp_path / name).write_text(json.dumps(summary))
+
+    code = (
+        "import sys, profiling; "
+        f"profiling.main(['compare', {str(tmp_path / 'a.json')!r}, {str(tmp_path / 'b.json')!r}]); "
+        "assert 'pipeline' not in sys.modules and 'nltk' not in sys.modules"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=profiling.REPO_DIR,
+                         capture_output=True, text=True)
+    assert out.returncode == 0, out.stderr
+    assert "x.py:f (line 3)" in out.stdout
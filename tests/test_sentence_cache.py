@@ -0,0 +1,104 @@
+from collections import Counter
+
+import pytest
+
+import parity
+from decision_risk import (
+    AMBIGUOUS_TERMS, DECISION_VERBS, RISK_TERMS, VAGUE_PHRASES, decision_risk
+)
+from emotion_analysis import EMOTION_LEXICON, NEGATIVE_WORDS, POSITIVE_WORDS, emotion_analysis
+from nlp_utils import get_sentences, get_words, preprocess_text
+from sentence_cache import SENTENCE_CACHE, SentenceFeatureCache
+
+
+def _baseline_emotion_counts(text):
+    """Counts as emotion_analysis computed them from whole-text tokens."""
+    words = [w.lower() for w in get_words(text) if w.isalpha()]
+    sentences = get_sentences(text)
+    if not words:
+        return {}, 0.0
+    counts = {
+        emotion: sum(1 for w in words if w in lexicon)
+        for emotion, lexicon in EMOTION_LEXICON.items()
+    }
+    changes = 0
+    for s in sentences:
+        s_words = set(w.lower() for w in get_words(s) if w.isalpha())
+        if (s_words & POSITIVE_WORDS) and (s_words & NEGATIVE_WORDS):
+            changes += 1
+    return counts, round(changes / max(len(sentences), 1), 3)
+
+
+def _baseline_decision_details(text):
+    """Counts as decision_risk computed them before per-sentence caching."""
+    details = Counter()
+    for s in get_sentences(text):
+        s_words = set(w.lower() for w in get_words(s) if w.isalpha())
+        s_lower = s.lower()
+        details["decision_sentences"] += bool(s_words & DECISION_VERBS)
+        details["risk_mentions"] += sum(1 for r in RISK_TERMS if r in s_lower)
+        details["ambiguity_markers"] += sum(1 for a in AMBIGUOUS_TERMS if a in s_lower)
+        details["vague_phrases"] += sum(1 for v in VAGUE_PHRASES if v in s_lower)
+    return dict(details)
+
+
+def test_hits_and_misses():
+    cache = SentenceFeatureCache(maxsize=10)
+    calls = []
+
+    def compute(s):
+        calls.append(s)
+        return {"length": len(s)}
+
+    assert cache.get("ns", "Hello there.", compute) == {"length": 12}
+    # Case and surrounding whitespace don't change the key
+    assert cache.get("ns", "  hello THERE.", compute) == {"length": 12}
+    # Namespaces are separate
+    cache.get("other", "Hello there.", compute)
+
+    assert calls == ["Hello there.", "Hello there."]
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 2, 2)
+    assert stats["hit_rate"] == round(1 / 3, 4)
+
+    cache.clear()
+    assert cache.stats()["size"] == 0
+    assert cache.stats()["hits"] == cache.stats()["misses"] == 0
+
+
+def test_lru_eviction():
+    cache = SentenceFeatureCache(maxsize=2)
+    compute = lambda s: {"s": s}
+
+    cache.get("ns", "a", compute)
+    cache.get("ns", "b", compute)
+    cache.get("ns", "a", compute)   # "a" is now most recently used
+    cache.get("ns", "c", compute)   # evicts "b"
+
+    assert cache.stats()["size"] == 2
+    misses = cache.stats()["misses"]
+    cache.get("ns", "a", compute)
+    cache.get("ns", "c", compute)
+    assert cache.stats()["misses"] == misses
+    cache.get("ns", "b", compute)
+    assert cache.stats()["misses"] == misses + 1
+
+
+@pytest.mark.parametrize("warm", [False, True], ids=["cold", "warm"])
+def test_cached_analyzers_match_baseline_counts(warm):
+    SENTENCE_CACHE.clear()
+    corpus = parity.load_corpus()
+    if warm:
+        for text in corpus.values():
+            emotion_analysis(preprocess_text(text))
+            decision_risk(preprocess_text(text))
+
+    for doc_id, text in corpus.items():
+        text = preprocess_text(text)
+        counts, volatility = _baseline_emotion_counts(text)
+        emo = emotion_analysis(text)
+        assert emo["counts"] == counts, doc_id
+        assert emo["volatility"] == volatility, doc_id
+
+        assert decision_risk(text)["details"] == _baseline_decision_details(text), doc_id
+    SENTENCE_CACHE.clear()